@@ -1,98 +1,496 @@
-import requests
-import random
+import aiohttp
+import argparse
+import asyncio
+import collections
+import json
+import math
+import multiprocessing
+import numpy as np
+import os
+import queue
+import signal
+import socket
+import struct
 import time
-import threading
+from yarl import URL
 
-API_BASE_URL = "http://localhost:8000/api/leaderboard"
+# uvloop (libuv-based event loop) when available; it is not supported on Windows
+try:
+    import uvloop
+    run_loop = uvloop.run
+except ImportError:
+    run_loop = asyncio.run
 
-# Statistics for monitoring
-stats = {
-    "submitted": 0,
-    "fetched_top": 0,
-    "fetched_rank": 0,
-    "errors": 0
-}
+# 127.0.0.1 rather than localhost skips name resolution on new connections
+API_BASE_URL = "http://127.0.0.1:8000/api/leaderboard"
 
-def submit_score(user_id):
+# Request URLs are built once; fixed endpoints are pre-parsed yarl URLs and
+# rank lookups only append the user id
+TOP_URL = URL(f"{API_BASE_URL}/top")
+RANK_URL_PREFIX = f"{API_BASE_URL}/rank/"
+
+# Score submissions are batched and sent either as /submit/bulk calls
+# (--transport http, the default) or over the WebSocket score stream
+# (--transport ws, needs SCORE_STREAM_ENABLED=true on the server): each binary
+# frame is a batch of (user_id, score) big-endian uint32 pairs, acked in order
+SUBMIT_BULK_URL = URL(f"{API_BASE_URL}/submit/bulk")
+SUBMIT_WS_URL = URL(API_BASE_URL.replace("http", "ws", 1) + "/ws")
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# One load-generating process per core, each running WORKERS_PER_PROCESS
+# simulated users, with a per-process cap on concurrent in-flight requests.
+# Counts only the cores this process may run on (e.g. a CPU-limited
+# container), which are also the cores pin_to_core picks from
+if hasattr(os, "sched_getaffinity"):
+    NUM_PROCESSES = len(os.sched_getaffinity(0))
+else:
+    NUM_PROCESSES = os.cpu_count() or 1
+WORKERS_PER_PROCESS = 10
+MAX_IN_FLIGHT = 1000
+
+# The server speaks HTTP/1.1 only (no h2 multiplexing), so in-flight requests
+# share a bounded pool of keep-alive connections per process; requests beyond
+# MAX_CONNECTIONS wait for the next free connection instead of opening more
+MAX_CONNECTIONS = 100
+REQUEST_TIMEOUT = 10  # seconds
+
+# Idle pooled connections stay open across the workers' think-time sleeps
+KEEPALIVE_TIMEOUT = 60
+
+# Score submissions are queued and sent as one request or frame per batch of
+# up to BATCH_MAX, waiting at most BATCH_TIMEOUT seconds for a batch to fill
+BATCH_MAX = 64
+BATCH_TIMEOUT = 0.02
+RECONNECT_DELAY = 1  # seconds
+
+# Workers sleep until deadlines rounded up to a shared TICK-second timer, so a
+# single timer wakes every worker due in the same tick
+TICK = 0.01
+
+# Random draws are generated with numpy in batches of RNG_BATCH
+RNG_BATCH = 65536
+
+# Statistics for monitoring: each worker owns a list of counters indexed by
+# these slots. Every process sums its workers' counters and sends the totals
+# to the parent, which adds them up across processes when it prints
+SUBMITTED, FETCHED_TOP, FETCHED_RANK, ERRORS = range(4)
+worker_stats = []
+REPORT_INTERVAL = 5  # seconds
+PUBLISH_INTERVAL = 1  # seconds between per-process stats updates
+
+# Cleared once the parent signals shutdown; workers finish their current
+# action and exit
+running = True
+
+in_flight = asyncio.Semaphore(MAX_IN_FLIGHT)
+submit_queue = asyncio.Queue()
+
+# Tick number -> Event for workers waking in that tick, and the last tick fired
+wake_events = {}
+last_tick = -1
+
+class TokenBucket:
+    """
+    Request budget shared by the workers of one process: refills at `rate`
+    tokens per second and holds at most one second's worth
+    """
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.capacity = max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+def random_draws():
+    """
+    Yields (action, user_id, score, sleep) tuples, refilled RNG_BATCH at a time.
+    Converted to Python lists so values are plain ints/floats (JSON serializable).
+    """
+    rng = np.random.default_rng()
+    while True:
+        yield from zip(
+            rng.random(RNG_BATCH).tolist(),
+            rng.integers(1, 1000001, RNG_BATCH).tolist(),
+            rng.integers(100, 10001, RNG_BATCH).tolist(),
+            rng.uniform(0.1, 1.0, RNG_BATCH).tolist(),
+        )
+
+# Shared by all workers in this process; they run on one event loop thread
+draws = random_draws()
+
+async def submit_score(user_id, score):
+    """Queues a score for the next bulk flush. Returns the stats slot to count it under."""
     try:
-        score = random.randint(100, 10000)
-        resp = requests.post(f"{API_BASE_URL}/submit", json={"user_id": user_id, "score": score})
-        if resp.status_code == 200:
-            stats["submitted"] += 1
-        else:
-            stats["errors"] += 1
-    except Exception as e:
-        print(f"Error submitting score: {e}")
-        stats["errors"] += 1
+        done = asyncio.get_running_loop().create_future()
+        submit_queue.put_nowait((user_id, score, done))
+        status = await asyncio.wait_for(done, REQUEST_TIMEOUT)
+        return SUBMITTED if status == 201 else ERRORS
+    except asyncio.TimeoutError:
+        print("Error submitting score: no response")
+        return ERRORS
+    except Exception:
+        # Already reported once for the whole batch by the submitter
+        return ERRORS
 
-def get_top_players():
+async def get_top_players(session):
     try:
-        resp = requests.get(f"{API_BASE_URL}/top")
-        if resp.status_code == 200:
-            stats["fetched_top"] += 1
-        else:
-            stats["errors"] += 1
+        async with in_flight:
+            async with session.get(TOP_URL) as resp:
+                return FETCHED_TOP if resp.status == 200 else ERRORS
     except Exception as e:
         print(f"Error fetching top players: {e}")
-        stats["errors"] += 1
+        return ERRORS
 
-def get_user_rank(user_id):
+async def get_user_rank(session, user_id):
     try:
-        resp = requests.get(f"{API_BASE_URL}/rank/{user_id}")
-        if resp.status_code == 200:
-            stats["fetched_rank"] += 1
-        else:
-            # 404 is valid if user not found, but we count it as 'fetched'
-            if resp.status_code == 404:
-                stats["fetched_rank"] += 1
-            else:
-                stats["errors"] += 1
+        async with in_flight:
+            async with session.get(RANK_URL_PREFIX + str(user_id)) as resp:
+                # 404 is valid if user not found, but we count it as 'fetched'
+                return FETCHED_RANK if resp.status in (200, 404) else ERRORS
     except Exception as e:
         print(f"Error fetching rank: {e}")
-        stats["errors"] += 1
+        return ERRORS
+
+def resolve(batch, status=None, error=None):
+    """
+    Completes every pending submission in a batch with a status or an error
+    """
+    for _, _, done in batch:
+        if not done.done():
+            if error is None:
+                done.set_result(status)
+            else:
+                done.set_exception(error)
+
+def resolve_accepted(batch, rejected):
+    """
+    Completes a batch the server accepted. Scores for unknown users are
+    skipped by the server, not written, so those count as 404s
+    """
+    rejected = set(rejected)
+    for entry in batch:
+        resolve([entry], 404 if entry[0] in rejected else 201)
+
+async def next_batch():
+    """
+    Waits for queued submissions and returns up to BATCH_MAX of them, giving
+    a partial batch at most BATCH_TIMEOUT seconds to fill
+    """
+    batch = [await submit_queue.get()]
+    if submit_queue.qsize() < BATCH_MAX - 1:
+        await asyncio.sleep(BATCH_TIMEOUT)
+    while len(batch) < BATCH_MAX and not submit_queue.empty():
+        batch.append(submit_queue.get_nowait())
+    return batch
+
+async def flush_submissions(session, batch):
+    # user_id and score are plain ints, so the body can be formatted directly
+    # instead of building dicts for json.dumps
+    items = ",".join(f'{{"user_id":{user_id},"score":{score}}}' for user_id, score, _ in batch)
+    body = f'{{"items":[{items}]}}'.encode()
+    try:
+        async with in_flight:
+            async with session.post(SUBMIT_BULK_URL, data=body, headers=JSON_HEADERS) as resp:
+                if resp.status == 201:
+                    result = await resp.json()
+                    resolve_accepted(batch, result["data"]["rejected"])
+                else:
+                    await resp.read()
+                    resolve(batch, resp.status)
+    except Exception as e:
+        print(f"Error submitting scores: {e}")
+        resolve(batch, error=e)
+
+async def http_submitter(session):
+    """
+    Drains queued submissions into /submit/bulk calls
+    """
+    flushes = set()
+    while True:
+        batch = await next_batch()
+        # Flush in the background so the next batch can start filling
+        task = asyncio.create_task(flush_submissions(session, batch))
+        flushes.add(task)
+        task.add_done_callback(flushes.discard)
+
+async def read_acks(ws, pending):
+    """
+    Resolves sent batches in order as the server acks each frame
+    """
+    async for msg in ws:
+        if msg.type == aiohttp.WSMsgType.TEXT and pending:
+            ack = json.loads(msg.data)
+            batch = pending.popleft()
+            if ack["success"]:
+                resolve_accepted(batch, ack.get("rejected", ()))
+            else:
+                resolve(batch, 400)
+    error = aiohttp.ClientConnectionError("score stream closed")
+    while pending:
+        resolve(pending.popleft(), error=error)
+
+async def stream_batches(ws):
+    """
+    Drains queued submissions into score-stream frames until the socket fails
+    """
+    pending = collections.deque()
+    reader = asyncio.create_task(read_acks(ws, pending))
+    try:
+        while True:
+            batch = await next_batch()
+            if ws.closed:
+                resolve(batch, error=aiohttp.ClientConnectionError("score stream closed"))
+                raise aiohttp.ClientConnectionError("score stream closed")
+
+            frame = struct.pack(f">{2 * len(batch)}I", *[v for user_id, score, _ in batch for v in (user_id, score)])
+            pending.append(batch)
+            await ws.send_bytes(frame)
+    finally:
+        reader.cancel()
+        # Batches sent but not acked will never be acked on this socket
+        error = aiohttp.ClientConnectionError("score stream closed")
+        while pending:
+            resolve(pending.popleft(), error=error)
+
+async def stream_submitter(session):
+    """
+    Keeps the score stream connected, reconnecting after failures
+    """
+    while True:
+        try:
+            async with session.ws_connect(SUBMIT_WS_URL) as ws:
+                await stream_batches(ws)
+        except (aiohttp.ClientError, OSError) as e:
+            if isinstance(e, aiohttp.WSServerHandshakeError):
+                print(f"Score stream refused ({e.status}); is SCORE_STREAM_ENABLED=true set on the server?")
+            else:
+                print(f"Score stream error: {e}")
+            # Fail what is queued so workers count the errors and carry on
+            while not submit_queue.empty():
+                resolve([submit_queue.get_nowait()], error=e)
+            await asyncio.sleep(RECONNECT_DELAY)
+
+async def ticker():
+    """
+    Fires the shared tick: every TICK seconds, wakes all workers due by now
+    """
+    global last_tick
+    loop = asyncio.get_running_loop()
+    last_tick = math.floor(loop.time() / TICK)
+    while True:
+        await asyncio.sleep(max(0, (last_tick + 1) * TICK - loop.time()))
+        now_tick = math.floor(loop.time() / TICK)
+        while last_tick < now_tick:
+            last_tick += 1
+            event = wake_events.pop(last_tick, None)
+            if event is not None:
+                event.set()
+
+async def sleep_until(deadline):
+    """
+    Sleeps until the first shared tick at or after deadline (event loop time)
+    """
+    tick = math.ceil(deadline / TICK)
+    if tick <= last_tick:
+        return
+    event = wake_events.get(tick)
+    if event is None:
+        event = wake_events[tick] = asyncio.Event()
+    await event.wait()
 
-def worker(worker_id):
+async def worker(session, worker_id, bucket):
     """
     Simulates a single user's behavior loop
     """
     print(f"Worker {worker_id} started")
-    while True:
+    counts = [0, 0, 0, 0]
+    worker_stats.append(counts)
+    loop = asyncio.get_running_loop()
+    next_at = loop.time()
+    while running:
         # 80% chance to submit score (write heavy simulation)
         # 10% chance to check top players
         # 10% chance to check own rank
-        action = random.random()
-        
-        # Random user ID from the seeded range (1 to 1,000,000)
-        user_id = random.randint(1, 1000000)
+        # User IDs come from the seeded range (1 to 1,000,000), scores are
+        # 100-10000 and the think time is 100ms-1s
+        action, user_id, score, sleep_time = next(draws)
+
+        if bucket is not None:
+            await bucket.acquire()
 
         if action < 0.8:
-            submit_score(user_id)
+            slot = await submit_score(user_id, score)
         elif action < 0.9:
-            get_top_players()
+            slot = await get_top_players(session)
         else:
-            get_user_rank(user_id)
-            
-        # Random sleep between 100ms and 1s
-        time.sleep(random.uniform(0.1, 1.0))
+            slot = await get_user_rank(session, user_id)
+        counts[slot] += 1
+
+        # Deadline-based think time: the next action is due sleep_time after
+        # the previous deadline, not after this request finished. After a
+        # stall the deadline restarts from now, so the worker does not burst
+        # back-to-back requests to catch up
+        next_at = max(next_at, loop.time()) + sleep_time
+        await sleep_until(next_at)
+
+async def publish_stats(proc_id, stats_queue):
+    """
+    Sends this process's running totals to the parent every PUBLISH_INTERVAL
+    """
+    while True:
+        await asyncio.sleep(PUBLISH_INTERVAL)
+        stats_queue.put((proc_id, [sum(col) for col in zip(*worker_stats)]))
+
+async def watch_stop(stop):
+    """
+    Polls the parent's stop event and tells this process's workers to exit
+    """
+    global running
+    while not stop.is_set():
+        await asyncio.sleep(0.1)
+    running = False
+
+async def run_workers(proc_id, stats_queue, stop, rate, transport):
+    # One keep-alive pool shared by every worker coroutine
+    connector = aiohttp.TCPConnector(
+        limit=MAX_CONNECTIONS,
+        limit_per_host=MAX_CONNECTIONS,
+        family=socket.AF_INET,
+        use_dns_cache=True,
+        ttl_dns_cache=3600,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+    )
+    # Responses are small; asking for identity saves gzip work on both ends
+    headers = {"Connection": "keep-alive", "Accept-Encoding": "identity"}
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    async with (
+        aiohttp.ClientSession(connector=connector, timeout=timeout, headers=headers) as session,
+        asyncio.TaskGroup() as tg,
+    ):
+        background = [
+            tg.create_task(publish_stats(proc_id, stats_queue)),
+            tg.create_task(ticker()),
+            tg.create_task(stream_submitter(session) if transport == "ws" else http_submitter(session)),
+            tg.create_task(watch_stop(stop)),
+        ]
+        bucket = TokenBucket(rate) if rate > 0 else None
+        first_worker = proc_id * WORKERS_PER_PROCESS
+        # Waits for every worker; an unexpected error in one cancels the rest
+        async with asyncio.TaskGroup() as workers:
+            for i in range(WORKERS_PER_PROCESS):
+                workers.create_task(worker(session, first_worker + i, bucket))
+        for task in background:
+            task.cancel()
+
+    # Final totals, sent after every worker has finished
+    stats_queue.put((proc_id, [sum(col) for col in zip(*worker_stats)]))
+
+def pin_to_core(proc_id):
+    """
+    Pins this process to one CPU so its hot code and buffers stay in that
+    core's caches. Best effort: skipped where affinity is unsupported (macOS)
+    """
+    if hasattr(os, "sched_setaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+        os.sched_setaffinity(0, {cores[proc_id % len(cores)]})
+        return
+
+    try:
+        import psutil
+        process = psutil.Process()
+        cores = process.cpu_affinity()
+        process.cpu_affinity([cores[proc_id % len(cores)]])
+    except (ImportError, AttributeError):
+        pass
+
+def proc_main(proc_id, stats_queue, stop, rate, transport):
+    pin_to_core(proc_id)
+    # Ctrl+C is handled by the parent, which sets `stop` for a clean shutdown
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    run_loop(run_workers(proc_id, stats_queue, stop, rate, transport))
+
+def drain_stats(stats_queue, proc_stats):
+    """
+    Records the latest running totals sent by each process
+    """
+    try:
+        while True:
+            proc_id, counts = stats_queue.get_nowait()
+            proc_stats[proc_id] = counts
+    except queue.Empty:
+        pass
+
+def total_stats(proc_stats):
+    if not proc_stats:
+        return [0, 0, 0, 0]
+    return [sum(col) for col in zip(*proc_stats.values())]
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Leaderboard Load Test")
+    parser.add_argument("--duration", type=float, default=0, help="Seconds to run (0 = until Ctrl+C)")
+    parser.add_argument("--target-rps", type=float, default=0, help="Total requests per second across all workers (0 = unlimited)")
+    parser.add_argument("--transport", choices=("http", "ws"), default="http", help="Send score batches via POST /submit/bulk or the WebSocket score stream")
+    args = parser.parse_args()
+
     print("Starting Load Test Simulation...")
     print(f"Target: {API_BASE_URL}")
+    print(f"Processes: {NUM_PROCESSES} x {WORKERS_PER_PROCESS} workers")
+    print(f"Score transport: {args.transport}")
+    if args.target_rps > 0:
+        print(f"Target rate: {args.target_rps:g} req/s")
     print("Press Ctrl+C to stop")
 
-    # Spawn 10 concurrent threads to simulate load
-    threads = []
-    for i in range(10):
-        t = threading.Thread(target=worker, args=(i,))
-        t.daemon = True
-        t.start()
-        threads.append(t)
+    stats_queue = multiprocessing.Queue()
+    stop = multiprocessing.Event()
+    rate_per_process = args.target_rps / NUM_PROCESSES
+    procs = [
+        multiprocessing.Process(target=proc_main, args=(i, stats_queue, stop, rate_per_process, args.transport))
+        for i in range(NUM_PROCESSES)
+    ]
+    for p in procs:
+        p.start()
 
+    # Latest running totals reported by each process
+    proc_stats = {}
+    start_time = time.time()
     try:
-        start_time = time.time()
         while True:
-            time.sleep(5)
+            remaining = args.duration - (time.time() - start_time) if args.duration > 0 else REPORT_INTERVAL
+            if remaining <= 0:
+                break
+            time.sleep(min(REPORT_INTERVAL, remaining))
+            drain_stats(stats_queue, proc_stats)
             elapsed = int(time.time() - start_time)
-            print(f"[{elapsed}s] Stats: Submitted={stats['submitted']}, Top={stats['fetched_top']}, Rank={stats['fetched_rank']}, Errors={stats['errors']}")
+            submitted, top, rank, errors = total_stats(proc_stats)
+            print(f"[{elapsed}s] Stats: Submitted={submitted}, Top={top}, Rank={rank}, Errors={errors}")
     except KeyboardInterrupt:
-        print("\nStopping simulation...")
+        pass
+
+    print("\nStopping simulation...")
+    stop.set()
+    # Keep draining while the children exit: a child cannot finish until its
+    # queued stats have been flushed into the pipe, so joining first deadlocks
+    deadline = time.time() + REQUEST_TIMEOUT + 2
+    while any(p.is_alive() for p in procs) and time.time() < deadline:
+        drain_stats(stats_queue, proc_stats)
+        time.sleep(0.1)
+    for p in procs:
+        if p.is_alive():
+            p.terminate()
+        p.join()
+    drain_stats(stats_queue, proc_stats)
+
+    elapsed = time.time() - start_time
+    submitted, top, rank, errors = total_stats(proc_stats)
+    total = submitted + top + rank + errors
+    print(f"Total: Submitted={submitted}, Top={top}, Rank={rank}, Errors={errors} in {elapsed:.1f}s ({total / elapsed:.1f} req/s)")
@@ -4,20 +4,46 @@
  * Handles real-time leaderboard updates via WebSocket connections.
  * Subscribes to Redis pub/sub channel for cross-process communication.
  * Supports auto-reconnect and heartbeat for connection health.
+ * 
+ * With SCORE_STREAM_ENABLED=true, also accepts a write-only score stream on
+ * /api/leaderboard/ws: each binary frame carries (user_id, score) pairs as
+ * big-endian uint32s and is answered with one JSON ack, in order. This avoids
+ * per-score HTTP framing for high-volume clients such as the load-test script.
+ * Each score in a frame is charged to the same per-IP write budget as /submit.
  */
 
 const { WebSocketServer } = require('ws');
 const { getSubClient, getPubClient } = require('./redis');
+const { BULK_SUBMIT_MAX, validateScoreEntries } = require('../middleware/validator');
+const { SUBMIT_MAX_REQUESTS, takeScoreBudget } = require('../middleware/rateLimiter');
 
 let wss = null;
+let ingestWss = null;
 const CHANNEL = 'leaderboard:updates';
 
+const UPDATES_PATH = '/ws';
+const INGEST_PATH = '/api/leaderboard/ws';
+const INGEST_ENTRY_BYTES = 8; // uint32 user_id + uint32 score
+
 /**
  * Initialize WebSocket server on existing HTTP server
  * @param {object} server - HTTP server instance
  */
 const initWebSocket = (server) => {
-    wss = new WebSocketServer({ server, path: '/ws' });
+    // Both servers share the HTTP server, so upgrades are routed by path
+    wss = new WebSocketServer({ noServer: true });
+    ingestWss = process.env.SCORE_STREAM_ENABLED === 'true'
+        ? new WebSocketServer({
+            noServer: true,
+            maxPayload: BULK_SUBMIT_MAX * INGEST_ENTRY_BYTES,
+        })
+        : null;
+
+    server.on('upgrade', _routeUpgrade);
+
+    if (ingestWss) {
+        ingestWss.on('connection', _handleIngestConnection);
+    }
 
     wss.on('connection', (ws, req) => {
         const clientIp = req.socket.remoteAddress;
@@ -43,7 +69,7 @@ const initWebSocket = (server) => {
 
     // Heartbeat interval — close dead connections every 30s
     const heartbeatInterval = setInterval(() => {
-        wss.clients.forEach((ws) => {
+        [...wss.clients, ...(ingestWss ? ingestWss.clients : [])].forEach((ws) => {
             if (!ws.isAlive) {
                 return ws.terminate();
             }
@@ -59,7 +85,105 @@ const initWebSocket = (server) => {
     // Subscribe to Redis pub/sub for leaderboard updates
     _subscribeToUpdates();
 
-    console.log('[WS] WebSocket server initialized on /ws');
+    console.log(ingestWss
+        ? `[WS] WebSocket server initialized on ${UPDATES_PATH} (score stream on ${INGEST_PATH})`
+        : `[WS] WebSocket server initialized on ${UPDATES_PATH}`);
+};
+
+/**
+ * Hand an HTTP upgrade to the WebSocket server for its path; anything else
+ * is dropped. The path is split off by hand (as ws does) rather than parsed
+ * with URL, which throws on malformed request targets.
+ * @param {object} req - HTTP request
+ * @param {object} socket - Network socket
+ * @param {Buffer} head - First packet of the upgraded stream
+ */
+const _routeUpgrade = (req, socket, head) => {
+    const pathname = (req.url || '').split('?')[0];
+    const target = pathname === UPDATES_PATH ? wss
+        : pathname === INGEST_PATH ? ingestWss
+            : null;
+
+    if (!target) {
+        socket.destroy();
+        return;
+    }
+    target.handleUpgrade(req, socket, head, (ws) => target.emit('connection', ws, req));
+};
+
+/**
+ * Set up a score-stream connection. Frames are processed one at a time so
+ * acks go out in the same order the frames arrived.
+ * @param {object} ws - WebSocket connection
+ * @param {object} req - Upgrade request
+ */
+const _handleIngestConnection = (ws, req) => {
+    const clientIp = req.socket.remoteAddress;
+    ws.isAlive = true;
+    ws.on('pong', () => { ws.isAlive = true; });
+
+    let pending = Promise.resolve();
+    ws.on('message', (data, isBinary) => {
+        pending = pending.then(() => _ingestFrame(ws, clientIp, data, isBinary));
+    });
+
+    ws.on('error', (err) => {
+        console.error('[WS] Score stream error:', err.message);
+    });
+};
+
+/**
+ * Decode, validate and submit one score-stream frame, then ack it
+ * @param {object} ws - WebSocket connection
+ * @param {string} clientIp - Client IP, for rate limiting
+ * @param {Buffer} data - Frame payload
+ * @param {boolean} isBinary - Whether the frame was binary
+ */
+const _ingestFrame = async (ws, clientIp, data, isBinary) => {
+    const reply = (body) => {
+        if (ws.readyState === 1) { // WebSocket.OPEN
+            ws.send(JSON.stringify(body));
+        }
+    };
+
+    // One unit per score in the frame (at least one for malformed frames)
+    const scores = Math.max(1, Math.floor(data.length / INGEST_ENTRY_BYTES));
+    if (takeScoreBudget(clientIp, scores).count > SUBMIT_MAX_REQUESTS) {
+        return reply({
+            success: false,
+            error: 'Too many score submissions. Please try again later.',
+        });
+    }
+
+    if (!isBinary || data.length === 0 || data.length % INGEST_ENTRY_BYTES !== 0) {
+        return reply({
+            success: false,
+            error: 'frame must be binary (user_id, score) uint32 pairs',
+        });
+    }
+
+    const items = [];
+    for (let offset = 0; offset < data.length; offset += INGEST_ENTRY_BYTES) {
+        items.push({
+            user_id: data.readUInt32BE(offset),
+            score: data.readUInt32BE(offset + 4),
+        });
+    }
+
+    const { error, entries } = validateScoreEntries(items);
+    if (error) {
+        return reply({ success: false, error });
+    }
+
+    try {
+        // Required lazily: the service itself depends on this module
+        const { submitScoresBulk } = require('../services/leaderboard.service');
+        const result = await submitScoresBulk(entries);
+        reply({ success: true, submitted: result.data.submitted, rejected: result.data.rejected });
+    } catch (err) {
+        console.error('[WS] Score stream submit error:', err.message);
+        reply({ success: false, error: 'Internal server error' });
+    }
 };
 
 /**
@@ -130,6 +254,10 @@ const getClientCount = () => {
  * Close WebSocket server
  */
 const closeWebSocket = () => {
+    if (ingestWss) {
+        ingestWss.close();
+        ingestWss = null;
+    }
     if (wss) {
         wss.close();
         console.log('[WS] Server closed');
@@ -141,4 +269,7 @@ module.exports = {
     publishUpdate,
     getClientCount,
     closeWebSocket,
+    // Exported for tests
+    _routeUpgrade,
+    _ingestFrame,
 };
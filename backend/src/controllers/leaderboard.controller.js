@@ -22,6 +22,19 @@ const submitScore = async (req, res, next) => {
     }
 };
 
+/**
+ * POST /api/leaderboard/submit/bulk
+ * Submit a batch of scores in a single transaction
+ */
+const submitScoresBulk = async (req, res, next) => {
+    try {
+        const result = await leaderboardService.submitScoresBulk(req.validatedItems);
+        res.status(201).json(result);
+    } catch (err) {
+        next(err);
+    }
+};
+
 /**
  * GET /api/leaderboard/top
  * Get top 10 players by total score
@@ -72,6 +85,7 @@ const recalculateRanks = async (req, res, next) => {
 
 module.exports = {
     submitScore,
+    submitScoresBulk,
     getTopPlayers,
     getPlayerRank,
     recalculateRanks,
@@ -3,23 +3,105 @@
  * 
  * Protects APIs from abuse by limiting request frequency per IP.
  * Different limits for write (submit) vs read (top/rank) endpoints.
+ * 
+ * Writes share one budget per IP counted in scores, not requests: a /submit
+ * call costs 1 and a /submit/bulk call costs one per item, so batching
+ * cannot raise how many scores an IP may write per window.
  */
 
 const rateLimit = require('express-rate-limit');
+const { BULK_SUBMIT_MAX } = require('./validator');
+
+// Write budget per IP (in scores)
+const SUBMIT_WINDOW_MS = parseInt(process.env.RATE_LIMIT_WINDOW_MS, 10) || 60000;
+const SUBMIT_MAX_REQUESTS = parseInt(process.env.RATE_LIMIT_MAX_REQUESTS, 10) || 100;
+
+const TOO_MANY_SUBMISSIONS = {
+    success: false,
+    error: 'Too many score submissions. Please try again later.',
+};
+
+// Scores charged per IP in the current window
+const scoreBudgets = new Map();
+let nextPruneAt = 0;
+
+/**
+ * Charge scores against an IP's write budget
+ * @param {string} key - Client IP
+ * @param {number} scores - Number of scores to charge
+ * @param {number} [now] - Current time (ms)
+ * @returns {{ count: number, resetAt: number }} Budget after charging
+ */
+const takeScoreBudget = (key, scores, now = Date.now()) => {
+    // Drop finished windows at most once per window
+    if (now >= nextPruneAt) {
+        for (const [ip, budget] of scoreBudgets) {
+            if (now >= budget.resetAt) {
+                scoreBudgets.delete(ip);
+            }
+        }
+        nextPruneAt = now + SUBMIT_WINDOW_MS;
+    }
+
+    let budget = scoreBudgets.get(key);
+    if (!budget || now >= budget.resetAt) {
+        budget = { count: 0, resetAt: now + SUBMIT_WINDOW_MS };
+        scoreBudgets.set(key, budget);
+    }
+    budget.count += scores;
+    return budget;
+};
+
+/**
+ * express-rate-limit store backed by the shared score budget, so /submit
+ * draws from the same counter as bulk and streamed submissions
+ */
+class ScoreBudgetStore {
+    async increment(key) {
+        const budget = takeScoreBudget(key, 1);
+        return { totalHits: budget.count, resetTime: new Date(budget.resetAt) };
+    }
+
+    async decrement(key) {
+        const budget = scoreBudgets.get(key);
+        if (budget && budget.count > 0) {
+            budget.count--;
+        }
+    }
+
+    async resetKey(key) {
+        scoreBudgets.delete(key);
+    }
+}
 
 // Stricter limit for score submissions (write operations)
 const submitLimiter = rateLimit({
-    windowMs: parseInt(process.env.RATE_LIMIT_WINDOW_MS, 10) || 60000,
-    max: parseInt(process.env.RATE_LIMIT_MAX_REQUESTS, 10) || 100,
-    message: {
-        success: false,
-        error: 'Too many score submissions. Please try again later.',
-    },
+    windowMs: SUBMIT_WINDOW_MS,
+    max: SUBMIT_MAX_REQUESTS,
+    message: TOO_MANY_SUBMISSIONS,
     standardHeaders: true,
     legacyHeaders: false,
     keyGenerator: (req) => req.ip,
+    store: new ScoreBudgetStore(),
 });
 
+/**
+ * Bulk submissions cost one unit of the write budget per item. Runs before
+ * validation, so malformed and oversized batches are charged too (capped at
+ * BULK_SUBMIT_MAX)
+ */
+const bulkSubmitLimiter = (req, res, next) => {
+    const items = req.body?.items;
+    const scores = Array.isArray(items) ? Math.min(Math.max(items.length, 1), BULK_SUBMIT_MAX) : 1;
+    const budget = takeScoreBudget(req.ip, scores);
+
+    if (budget.count > SUBMIT_MAX_REQUESTS) {
+        res.set('Retry-After', String(Math.ceil((budget.resetAt - Date.now()) / 1000)));
+        return res.status(429).json(TOO_MANY_SUBMISSIONS);
+    }
+    next();
+};
+
 // More relaxed limit for read operations
 const readLimiter = rateLimit({
     windowMs: 60000,
@@ -33,4 +115,11 @@ const readLimiter = rateLimit({
     keyGenerator: (req) => req.ip,
 });
 
-module.exports = { submitLimiter, readLimiter };
+module.exports = {
+    SUBMIT_WINDOW_MS,
+    SUBMIT_MAX_REQUESTS,
+    takeScoreBudget,
+    submitLimiter,
+    bulkSubmitLimiter,
+    readLimiter,
+};
@@ -5,57 +5,107 @@
  * Prevents SQL injection, invalid data, and malformed requests.
  */
 
+// Maximum number of entries accepted by a single bulk submission
+const BULK_SUBMIT_MAX = 100;
+
 /**
- * Validate score submission request body
+ * Parse and validate a single { user_id, score } pair
+ * @returns {{ error: string } | { userId: number, score: number }}
  */
-const validateSubmitScore = (req, res, next) => {
-    const { user_id, score } = req.body;
-
+const _parseScoreEntry = (user_id, score) => {
     // user_id validation
     if (user_id === undefined || user_id === null) {
-        return res.status(400).json({
-            success: false,
-            error: 'user_id is required',
-        });
+        return { error: 'user_id is required' };
     }
 
     const userId = parseInt(user_id, 10);
     if (isNaN(userId) || userId <= 0) {
-        return res.status(400).json({
-            success: false,
-            error: 'user_id must be a positive integer',
-        });
+        return { error: 'user_id must be a positive integer' };
     }
 
     // score validation
     if (score === undefined || score === null) {
+        return { error: 'score is required' };
+    }
+
+    const scoreVal = parseInt(score, 10);
+    if (isNaN(scoreVal) || scoreVal < 0) {
+        return { error: 'score must be a non-negative integer' };
+    }
+
+    if (scoreVal > 1000000) {
+        return { error: 'score exceeds maximum allowed value (1,000,000)' };
+    }
+
+    return { userId, score: scoreVal };
+};
+
+/**
+ * Validate a list of { user_id, score } items (shared by HTTP bulk submit
+ * and the WebSocket score stream)
+ * @returns {{ error: string } | { entries: Array<{userId: number, score: number}> }}
+ */
+const validateScoreEntries = (items) => {
+    const entries = [];
+    for (let i = 0; i < items.length; i++) {
+        const entry = _parseScoreEntry(items[i]?.user_id, items[i]?.score);
+        if (entry.error) {
+            return { error: `items[${i}]: ${entry.error}` };
+        }
+        entries.push(entry);
+    }
+    return { entries };
+};
+
+/**
+ * Validate score submission request body
+ */
+const validateSubmitScore = (req, res, next) => {
+    const { user_id, score } = req.body;
+
+    const entry = _parseScoreEntry(user_id, score);
+    if (entry.error) {
         return res.status(400).json({
             success: false,
-            error: 'score is required',
+            error: entry.error,
         });
     }
 
-    const scoreVal = parseInt(score, 10);
-    if (isNaN(scoreVal) || scoreVal < 0) {
+    // Sanitize and attach parsed values
+    req.validatedData = entry;
+
+    next();
+};
+
+/**
+ * Validate bulk score submission request body: { items: [{ user_id, score }] }
+ */
+const validateBulkSubmit = (req, res, next) => {
+    const { items } = req.body;
+
+    if (!Array.isArray(items) || items.length === 0) {
         return res.status(400).json({
             success: false,
-            error: 'score must be a non-negative integer',
+            error: 'items must be a non-empty array',
         });
     }
 
-    if (scoreVal > 1000000) {
+    if (items.length > BULK_SUBMIT_MAX) {
         return res.status(400).json({
             success: false,
-            error: 'score exceeds maximum allowed value (1,000,000)',
+            error: `items exceeds maximum batch size (${BULK_SUBMIT_MAX})`,
         });
     }
 
-    // Sanitize and attach parsed values
-    req.validatedData = {
-        userId,
-        score: scoreVal,
-    };
+    const { error, entries } = validateScoreEntries(items);
+    if (error) {
+        return res.status(400).json({
+            success: false,
+            error,
+        });
+    }
 
+    req.validatedItems = entries;
     next();
 };
 
@@ -77,4 +127,10 @@ const validateUserId = (req, res, next) => {
     next();
 };
 
-module.exports = { validateSubmitScore, validateUserId };
+module.exports = {
+    BULK_SUBMIT_MAX,
+    validateScoreEntries,
+    validateSubmitScore,
+    validateBulkSubmit,
+    validateUserId,
+};
@@ -9,8 +9,8 @@ const express = require('express');
 const router = express.Router();
 
 const leaderboardController = require('../controllers/leaderboard.controller');
-const { validateSubmitScore, validateUserId } = require('../middleware/validator');
-const { submitLimiter, readLimiter } = require('../middleware/rateLimiter');
+const { validateSubmitScore, validateBulkSubmit, validateUserId } = require('../middleware/validator');
+const { submitLimiter, bulkSubmitLimiter, readLimiter } = require('../middleware/rateLimiter');
 
 // ─── Score Submission ───────────────────────────────────────────────────────
 // POST /api/leaderboard/submit
@@ -21,6 +21,15 @@ router.post(
     leaderboardController.submitScore
 );
 
+// ─── Bulk Score Submission ──────────────────────────────────────────────────
+// POST /api/leaderboard/submit/bulk
+router.post(
+    '/submit/bulk',
+    bulkSubmitLimiter,
+    validateBulkSubmit,
+    leaderboardController.submitScoresBulk
+);
+
 // ─── Top Players ────────────────────────────────────────────────────────────
 // GET /api/leaderboard/top
 router.get(
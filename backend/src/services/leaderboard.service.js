@@ -110,6 +110,103 @@ const submitScore = async (userId, score) => {
     }
 };
 
+/**
+ * Submit a batch of scores in one transaction
+ * 
+ * Same flow as submitScore, but set-oriented: all sessions are inserted
+ * with a single unnest() INSERT and each affected user's leaderboard row is
+ * upserted once, so a batch costs two statements instead of two per score.
+ * Scores for user ids with no users row are skipped and reported back in
+ * `rejected` rather than failing the whole batch.
+ * 
+ * @param {Array<{userId: number, score: number}>} items - Scores to submit
+ * @returns {Promise<object>} Submission result
+ */
+const submitScoresBulk = async (items) => {
+    const userIds = items.map((item) => item.userId);
+    const scores = items.map((item) => item.score);
+
+    const client = await db.getClient();
+
+    try {
+        await client.query('BEGIN');
+
+        // 1. Insert game sessions for the users that exist
+        const sessionResult = await client.query(
+            `INSERT INTO game_sessions (user_id, score, game_mode, timestamp)
+       SELECT t.user_id, t.score, CASE WHEN t.score > 5000 THEN 'solo' ELSE 'team' END, NOW()
+       FROM unnest($1::int[], $2::int[]) AS t(user_id, score)
+       JOIN users u ON u.id = t.user_id
+       RETURNING id, user_id`,
+            [userIds, scores]
+        );
+
+        const accepted = new Set(sessionResult.rows.map((row) => row.user_id));
+        const uniqueUserIds = [...accepted];
+        const rejected = [...new Set(userIds)].filter((id) => !accepted.has(id));
+
+        // 2. Upsert one leaderboard entry per affected user. Rows are locked
+        // in user_id order so concurrent batches cannot deadlock
+        const leaderboardResult = uniqueUserIds.length === 0 ? { rows: [] } : await client.query(
+            `INSERT INTO leaderboard (user_id, total_score, rank)
+       SELECT user_id, COALESCE(AVG(score)::int, 0), 0
+       FROM game_sessions
+       WHERE user_id = ANY($1::int[])
+       GROUP BY user_id
+       ORDER BY user_id
+       ON CONFLICT (user_id)
+       DO UPDATE SET total_score = EXCLUDED.total_score
+       RETURNING user_id, total_score`,
+            [uniqueUserIds]
+        );
+
+        await client.query('COMMIT');
+
+        // 3. Invalidate caches (after commit to ensure data is persisted)
+        await _invalidateCacheMany(uniqueUserIds);
+
+        // 4. Broadcast one update per affected user
+        const totals = new Map(leaderboardResult.rows.map((row) => [row.user_id, row.total_score]));
+        // RETURNING order is not guaranteed, so take each user's newest session
+        const lastSession = new Map();
+        for (const row of sessionResult.rows) {
+            const current = lastSession.get(row.user_id);
+            if (current === undefined || row.id > current) {
+                lastSession.set(row.user_id, row.id);
+            }
+        }
+        const lastScore = new Map(items.map((item) => [item.userId, item.score]));
+
+        for (const userId of uniqueUserIds) {
+            publishUpdate({
+                userId,
+                newScore: lastScore.get(userId),
+                totalScore: totals.get(userId),
+                sessionId: lastSession.get(userId),
+            }).catch((err) =>
+                console.error('[WS] Broadcast error:', err.message)
+            );
+        }
+
+        return {
+            success: true,
+            data: {
+                submitted: sessionResult.rows.length,
+                rejected,
+                players: leaderboardResult.rows.map((row) => ({
+                    user_id: row.user_id,
+                    total_score: row.total_score,
+                })),
+            },
+        };
+    } catch (err) {
+        await client.query('ROLLBACK');
+        throw err;
+    } finally {
+        client.release();
+    }
+};
+
 /**
  * Get top 10 players sorted by total_score
  * 
@@ -328,8 +425,23 @@ const _invalidateCache = async (userId) => {
     }
 };
 
+/**
+ * Invalidate caches for a batch of score updates in a single DEL
+ * @param {number[]} userIds - The users whose caches should be invalidated
+ */
+const _invalidateCacheMany = async (userIds) => {
+    try {
+        const redis = getRedisClient();
+        await redis.del(CACHE_KEYS.TOP_LEADERBOARD, ...userIds.map((id) => CACHE_KEYS.PLAYER_RANK(id)));
+    } catch (err) {
+        // Cache invalidation failure is not critical
+        console.error('[Cache] Invalidation error:', err.message);
+    }
+};
+
 module.exports = {
     submitScore,
+    submitScoresBulk,
     getTopPlayers,
     getPlayerRank,
     recalculateRanks,
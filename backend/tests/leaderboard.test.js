@@ -76,6 +76,11 @@ const mockClient = mockPool._mockClient;
 
 // Import app AFTER mocks
 const { app } = require('../src/app');
+const { publishUpdate } = require('../src/config/websocket');
+const {
+    SUBMIT_MAX_REQUESTS,
+    bulkSubmitLimiter,
+} = require('../src/middleware/rateLimiter');
 
 // ─── Test Data ──────────────────────────────────────────────────────────────
 const mockTopPlayers = {
@@ -215,6 +220,160 @@ describe('Leaderboard API', () => {
         });
     });
 
+    // ═══════════════════════════════════════════════════════════════════════════
+    // POST /api/leaderboard/submit/bulk
+    // ═══════════════════════════════════════════════════════════════════════════
+    describe('POST /api/leaderboard/submit/bulk', () => {
+        it('should accept a valid batch in one transaction', async () => {
+            mockClient.query
+                .mockResolvedValueOnce()  // BEGIN
+                .mockResolvedValueOnce({ rows: [{ id: 1, user_id: 1 }, { id: 2, user_id: 2 }, { id: 3, user_id: 1 }] })
+                .mockResolvedValueOnce({ rows: [{ user_id: 1, total_score: 700 }, { user_id: 2, total_score: 300 }] })
+                .mockResolvedValueOnce();  // COMMIT
+
+            const res = await request(app)
+                .post('/api/leaderboard/submit/bulk')
+                .send({ items: [{ user_id: 1, score: 500 }, { user_id: 2, score: 300 }, { user_id: 1, score: 900 }] });
+
+            expect(res.status).toBe(201);
+            expect(res.body.success).toBe(true);
+            expect(res.body.data).toHaveProperty('submitted', 3);
+            expect(res.body.data.rejected).toEqual([]);
+            expect(res.body.data.players).toHaveLength(2);
+            expect(mockClient.query).toHaveBeenCalledTimes(4);
+            expect(mockClient.query).toHaveBeenCalledWith('COMMIT');
+        });
+
+        it('should skip unknown users instead of failing the batch', async () => {
+            mockClient.query
+                .mockResolvedValueOnce()  // BEGIN
+                .mockResolvedValueOnce({ rows: [{ id: 1, user_id: 1 }] })
+                .mockResolvedValueOnce({ rows: [{ user_id: 1, total_score: 500 }] })
+                .mockResolvedValueOnce();  // COMMIT
+
+            const res = await request(app)
+                .post('/api/leaderboard/submit/bulk')
+                .send({ items: [{ user_id: 1, score: 500 }, { user_id: 999999, score: 300 }] });
+
+            expect(res.status).toBe(201);
+            expect(res.body.data).toHaveProperty('submitted', 1);
+            expect(res.body.data.rejected).toEqual([999999]);
+            expect(mockClient.query.mock.calls[2][1]).toEqual([[1]]);
+        });
+
+        it('should lock leaderboard rows in user_id order', async () => {
+            mockClient.query
+                .mockResolvedValueOnce()  // BEGIN
+                .mockResolvedValueOnce({ rows: [{ id: 1, user_id: 2 }, { id: 2, user_id: 1 }] })
+                .mockResolvedValueOnce({ rows: [{ user_id: 1, total_score: 300 }, { user_id: 2, total_score: 500 }] })
+                .mockResolvedValueOnce();  // COMMIT
+
+            await request(app)
+                .post('/api/leaderboard/submit/bulk')
+                .send({ items: [{ user_id: 2, score: 500 }, { user_id: 1, score: 300 }] });
+
+            expect(mockClient.query.mock.calls[2][0]).toContain('ORDER BY user_id');
+        });
+
+        it('should broadcast each user\'s newest session', async () => {
+            publishUpdate.mockClear();
+            mockClient.query
+                .mockResolvedValueOnce()  // BEGIN
+                // RETURNING rows in a different order than the input
+                .mockResolvedValueOnce({ rows: [{ id: 12, user_id: 1 }, { id: 11, user_id: 1 }] })
+                .mockResolvedValueOnce({ rows: [{ user_id: 1, total_score: 700 }] })
+                .mockResolvedValueOnce();  // COMMIT
+
+            await request(app)
+                .post('/api/leaderboard/submit/bulk')
+                .send({ items: [{ user_id: 1, score: 500 }, { user_id: 1, score: 900 }] });
+
+            expect(publishUpdate).toHaveBeenCalledWith(expect.objectContaining({ userId: 1, sessionId: 12 }));
+        });
+
+        it('should charge the rate limit per score', () => {
+            const req = {
+                ip: '10.9.0.1',
+                body: { items: Array.from({ length: 100 }, (_, i) => ({ user_id: i + 1, score: 100 })) },
+            };
+            const res = {
+                set: jest.fn(),
+                status: jest.fn().mockReturnThis(),
+                json: jest.fn(),
+            };
+            const next = jest.fn();
+
+            for (let i = 0; i < SUBMIT_MAX_REQUESTS / 100; i++) {
+                bulkSubmitLimiter(req, res, next);
+            }
+            expect(next).toHaveBeenCalledTimes(SUBMIT_MAX_REQUESTS / 100);
+
+            bulkSubmitLimiter({ ...req, body: { items: [req.body.items[0]] } }, res, next);
+            expect(res.status).toHaveBeenCalledWith(429);
+            expect(next).toHaveBeenCalledTimes(SUBMIT_MAX_REQUESTS / 100);
+        });
+
+        it('should not upsert when no user exists', async () => {
+            mockClient.query
+                .mockResolvedValueOnce()  // BEGIN
+                .mockResolvedValueOnce({ rows: [] })
+                .mockResolvedValueOnce();  // COMMIT
+
+            const res = await request(app)
+                .post('/api/leaderboard/submit/bulk')
+                .send({ items: [{ user_id: 999999, score: 300 }] });
+
+            expect(res.status).toBe(201);
+            expect(res.body.data).toHaveProperty('submitted', 0);
+            expect(res.body.data.rejected).toEqual([999999]);
+            expect(mockClient.query).toHaveBeenCalledTimes(3);
+        });
+
+        it('should reject empty items', async () => {
+            const res = await request(app)
+                .post('/api/leaderboard/submit/bulk')
+                .send({ items: [] });
+
+            expect(res.status).toBe(400);
+            expect(res.body.success).toBe(false);
+            expect(res.body.error).toContain('items');
+        });
+
+        it('should reject a batch with an invalid entry', async () => {
+            const res = await request(app)
+                .post('/api/leaderboard/submit/bulk')
+                .send({ items: [{ user_id: 1, score: 500 }, { user_id: 2, score: -1 }] });
+
+            expect(res.status).toBe(400);
+            expect(res.body.success).toBe(false);
+            expect(res.body.error).toContain('items[1]');
+        });
+
+        it('should reject oversized batches', async () => {
+            const items = Array.from({ length: 101 }, (_, i) => ({ user_id: i + 1, score: 100 }));
+            const res = await request(app)
+                .post('/api/leaderboard/submit/bulk')
+                .send({ items });
+
+            expect(res.status).toBe(400);
+            expect(res.body.success).toBe(false);
+        });
+
+        it('should rollback on database error', async () => {
+            mockClient.query
+                .mockResolvedValueOnce()  // BEGIN
+                .mockRejectedValueOnce(new Error('DB Error'));
+
+            const res = await request(app)
+                .post('/api/leaderboard/submit/bulk')
+                .send({ items: [{ user_id: 1, score: 500 }] });
+
+            expect(res.status).toBe(500);
+            expect(mockClient.query).toHaveBeenCalledWith('ROLLBACK');
+            expect(mockClient.release).toHaveBeenCalled();
+        });
+    });
+
     // ═══════════════════════════════════════════════════════════════════════════
     // GET /api/leaderboard/top
     // ═══════════════════════════════════════════════════════════════════════════
@@ -9,3 +9,4 @@ process.env.DB_PORT = '5432';
 process.env.DB_USER = 'postgres';
 process.env.DB_PASSWORD = 'password';
 process.env.DB_NAME = 'gaming_leaderboard_test';
+process.env.RATE_LIMIT_MAX_REQUESTS = '1000'; // Suites share one client IP
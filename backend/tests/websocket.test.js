@@ -0,0 +1,278 @@
+/**
+ * WebSocket Score Stream - Unit & Integration Tests
+ *
+ * Tests the binary score stream on /api/leaderboard/ws:
+ * - Frame decoding, validation and acks (_ingestFrame)
+ * - Upgrade routing, the SCORE_STREAM_ENABLED flag and frame size limit
+ */
+
+const http = require('http');
+const net = require('net');
+const WebSocket = require('ws');
+
+// Small submit budget so the limit is reachable in a test
+process.env.RATE_LIMIT_MAX_REQUESTS = '5';
+
+// ─── Mock Redis module directly ─────────────────────────────────────────────
+jest.mock('../src/config/redis', () => ({
+    getSubClient: jest.fn().mockReturnValue(null),
+    getPubClient: jest.fn().mockReturnValue(null),
+}));
+
+// ─── Mock leaderboard service ───────────────────────────────────────────────
+jest.mock('../src/services/leaderboard.service', () => ({
+    submitScoresBulk: jest.fn(),
+}));
+
+const { submitScoresBulk } = require('../src/services/leaderboard.service');
+const {
+    initWebSocket,
+    closeWebSocket,
+    _ingestFrame,
+} = require('../src/config/websocket');
+
+// ─── Helpers ────────────────────────────────────────────────────────────────
+
+/** Pack [user_id, score] pairs into a score-stream frame */
+const frame = (pairs) => {
+    const buf = Buffer.alloc(pairs.length * 8);
+    pairs.forEach(([userId, score], i) => {
+        buf.writeUInt32BE(userId, i * 8);
+        buf.writeUInt32BE(score, i * 8 + 4);
+    });
+    return buf;
+};
+
+/** Stand-in for a connected socket that records parsed acks */
+const fakeSocket = () => ({
+    readyState: 1,
+    acks: [],
+    send(message) { this.acks.push(JSON.parse(message)); },
+});
+
+/** Start an HTTP server with WebSocket handling on a random port */
+const startServer = async () => {
+    const server = http.createServer();
+    initWebSocket(server);
+    await new Promise((resolve) => server.listen(0, '127.0.0.1', resolve));
+    return server;
+};
+
+const stopServer = (server) => {
+    closeWebSocket();
+    return new Promise((resolve) => server.close(resolve));
+};
+
+/** Send a raw upgrade request and return the status line, or null if dropped */
+const rawUpgrade = (port, target) => new Promise((resolve) => {
+    const socket = net.connect(port, '127.0.0.1', () => {
+        socket.write(
+            `GET ${target} HTTP/1.1\r\n` +
+            'Host: localhost\r\n' +
+            'Upgrade: websocket\r\n' +
+            'Connection: Upgrade\r\n' +
+            'Sec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\n' +
+            'Sec-WebSocket-Version: 13\r\n\r\n'
+        );
+    });
+    let data = '';
+    socket.on('data', (chunk) => {
+        data += chunk;
+        socket.destroy();
+    });
+    socket.on('close', () => resolve(data ? data.split('\r\n')[0] : null));
+    socket.on('error', () => {});
+});
+
+// ─── Tests ──────────────────────────────────────────────────────────────────
+
+describe('WebSocket Score Stream', () => {
+    beforeEach(() => {
+        submitScoresBulk.mockReset();
+    });
+
+    // ═══════════════════════════════════════════════════════════════════════════
+    // Frame handling
+    // ═══════════════════════════════════════════════════════════════════════════
+    describe('_ingestFrame', () => {
+        it('should decode a frame and submit its scores', async () => {
+            submitScoresBulk.mockResolvedValueOnce({ data: { submitted: 2, rejected: [] } });
+            const ws = fakeSocket();
+
+            await _ingestFrame(ws, '10.0.0.1', frame([[1, 500], [2, 300]]), true);
+
+            expect(submitScoresBulk).toHaveBeenCalledWith([
+                { userId: 1, score: 500 },
+                { userId: 2, score: 300 },
+            ]);
+            expect(ws.acks).toEqual([{ success: true, submitted: 2, rejected: [] }]);
+        });
+
+        it('should pass rejected user ids through to the ack', async () => {
+            submitScoresBulk.mockResolvedValueOnce({ data: { submitted: 1, rejected: [999999] } });
+            const ws = fakeSocket();
+
+            await _ingestFrame(ws, '10.0.0.2', frame([[1, 500], [999999, 300]]), true);
+
+            expect(ws.acks[0].rejected).toEqual([999999]);
+        });
+
+        it('should reject text frames', async () => {
+            const ws = fakeSocket();
+
+            await _ingestFrame(ws, '10.0.0.3', Buffer.from('{"user_id":1}'), false);
+
+            expect(ws.acks[0].success).toBe(false);
+            expect(submitScoresBulk).not.toHaveBeenCalled();
+        });
+
+        it('should reject empty or partial frames', async () => {
+            const ws = fakeSocket();
+
+            await _ingestFrame(ws, '10.0.0.4', Buffer.alloc(0), true);
+            await _ingestFrame(ws, '10.0.0.4', Buffer.alloc(12), true);
+
+            expect(ws.acks).toHaveLength(2);
+            expect(ws.acks.every((ack) => ack.success === false)).toBe(true);
+            expect(submitScoresBulk).not.toHaveBeenCalled();
+        });
+
+        it('should ack validation errors with the entry index', async () => {
+            const ws = fakeSocket();
+
+            await _ingestFrame(ws, '10.0.0.5', frame([[1, 500], [2, 2000000]]), true);
+
+            expect(ws.acks[0].success).toBe(false);
+            expect(ws.acks[0].error).toContain('items[1]');
+            expect(submitScoresBulk).not.toHaveBeenCalled();
+        });
+
+        it('should ack database errors without details', async () => {
+            submitScoresBulk.mockRejectedValueOnce(new Error('DB Error'));
+            const ws = fakeSocket();
+
+            await _ingestFrame(ws, '10.0.0.6', frame([[1, 500]]), true);
+
+            expect(ws.acks).toEqual([{ success: false, error: 'Internal server error' }]);
+        });
+
+        it('should stop writing once the IP budget is spent', async () => {
+            submitScoresBulk.mockResolvedValue({ data: { submitted: 1, rejected: [] } });
+            const ws = fakeSocket();
+
+            for (let i = 0; i < 6; i++) {
+                await _ingestFrame(ws, '10.0.0.7', frame([[1, 500]]), true);
+            }
+            await _ingestFrame(ws, '10.0.0.8', frame([[1, 500]]), true);
+
+            expect(submitScoresBulk).toHaveBeenCalledTimes(6);
+            expect(ws.acks[5].success).toBe(false);
+            expect(ws.acks[5].error).toContain('Too many');
+            expect(ws.acks[6].success).toBe(true);
+        });
+
+        it('should charge the rate limit per score, not per frame', async () => {
+            submitScoresBulk.mockResolvedValue({ data: { submitted: 3, rejected: [] } });
+            const ws = fakeSocket();
+            const scores = frame([[1, 500], [2, 300], [3, 700]]);
+
+            await _ingestFrame(ws, '10.0.0.9', scores, true);
+            await _ingestFrame(ws, '10.0.0.9', scores, true);
+
+            expect(submitScoresBulk).toHaveBeenCalledTimes(1);
+            expect(ws.acks[1].error).toContain('Too many');
+        });
+    });
+
+    // ═══════════════════════════════════════════════════════════════════════════
+    // Upgrade routing (stream disabled)
+    // ═══════════════════════════════════════════════════════════════════════════
+    describe('upgrade routing with the score stream disabled', () => {
+        let server;
+
+        beforeAll(async () => {
+            delete process.env.SCORE_STREAM_ENABLED;
+            server = await startServer();
+        });
+
+        afterAll(() => stopServer(server));
+
+        it('should accept the live updates path', async () => {
+            const status = await rawUpgrade(server.address().port, '/ws?client=test');
+            expect(status).toBe('HTTP/1.1 101 Switching Protocols');
+        });
+
+        it('should drop score stream upgrades', async () => {
+            const status = await rawUpgrade(server.address().port, '/api/leaderboard/ws');
+            expect(status).toBeNull();
+        });
+    });
+
+    // ═══════════════════════════════════════════════════════════════════════════
+    // Upgrade routing (stream enabled)
+    // ═══════════════════════════════════════════════════════════════════════════
+    describe('upgrade routing with the score stream enabled', () => {
+        let server;
+        let url;
+
+        beforeAll(async () => {
+            process.env.SCORE_STREAM_ENABLED = 'true';
+            server = await startServer();
+            url = `ws://127.0.0.1:${server.address().port}/api/leaderboard/ws`;
+        });
+
+        afterAll(async () => {
+            await stopServer(server);
+            delete process.env.SCORE_STREAM_ENABLED;
+        });
+
+        it('should drop unknown paths', async () => {
+            const status = await rawUpgrade(server.address().port, '/unknown');
+            expect(status).toBeNull();
+        });
+
+        it('should drop malformed request targets without crashing', async () => {
+            const status = await rawUpgrade(server.address().port, 'http://[');
+            expect(status).toBeNull();
+            expect(server.listening).toBe(true);
+        });
+
+        it('should ack frames in the order they were sent', async () => {
+            submitScoresBulk.mockImplementation(async (entries) => {
+                // The first frame finishes last if frames are not serialized
+                await new Promise((resolve) => setTimeout(resolve, entries.length === 1 ? 50 : 0));
+                return { data: { submitted: entries.length, rejected: [] } };
+            });
+
+            const client = new WebSocket(url);
+            await new Promise((resolve) => client.on('open', resolve));
+            const acks = [];
+            const done = new Promise((resolve) => {
+                client.on('message', (message) => {
+                    acks.push(JSON.parse(message.toString()));
+                    if (acks.length === 2) resolve();
+                });
+            });
+
+            client.send(frame([[1, 500]]));
+            client.send(frame([[2, 300], [3, 700]]));
+            await done;
+            client.close();
+
+            expect(acks.map((ack) => ack.submitted)).toEqual([1, 2]);
+        });
+
+        it('should close the connection on oversized frames', async () => {
+            const client = new WebSocket(url);
+            await new Promise((resolve) => client.on('open', resolve));
+
+            const code = await new Promise((resolve) => {
+                client.on('close', resolve);
+                client.send(Buffer.alloc(101 * 8));
+            });
+
+            expect(code).toBe(1009);
+            expect(submitScoresBulk).not.toHaveBeenCalled();
+        });
+    });
+});
@@ -6,131 +6,270 @@ Simulates real user behavior by continuously:
 - Fetching the top leaderboard
 - Looking up individual player ranks
 
-Logs response times for performance analysis.
+Reports p50/p95/p99/p99.9 response times every few seconds for performance analysis.
 
 Usage:
     python simulate.py
     python simulate.py --users 100000 --interval 0.5
+    python simulate.py --workers 50 --iterations 1000
+    python simulate.py --workers 1000 --concurrency 200
 """
 
-import requests
-import random
+import aiohttp
+import asyncio
+import math
+import numpy as np
 import time
+import socket
 import sys
 import argparse
-from datetime import datetime
-
-API_BASE_URL = "http://localhost:8000/api/leaderboard"
+from hdrh.histogram import HdrHistogram
+from yarl import URL
+
+# uvloop (libuv-based event loop) when available; it is not supported on Windows
+try:
+    import uvloop
+    run_loop = uvloop.run
+except ImportError:
+    run_loop = asyncio.run
+
+# 127.0.0.1 rather than localhost skips name resolution on new connections
+API_BASE_URL = "http://127.0.0.1:8000/api/leaderboard"
+
+# Request URLs are built once; fixed endpoints are pre-parsed yarl URLs and
+# rank lookups only append the user id
+SUBMIT_URL = URL(f"{API_BASE_URL}/submit")
+TOP_URL = URL(f"{API_BASE_URL}/top")
+RANK_URL_PREFIX = f"{API_BASE_URL}/rank/"
+
+# Idle pooled connections stay open across the users' think-time sleeps
+KEEPALIVE_TIMEOUT = 60
+
+# Scores are submitted one request at a time so the measured latency is the
+# server's; batched submission lives in backend/scripts/load_test.py
+JSON_HEADERS = {"Content-Type": "application/json"}
+REQUEST_TIMEOUT = 10  # seconds
+
+# Latencies are recorded in microseconds into one HdrHistogram per endpoint:
+# constant-time inserts and fixed memory over the whole run, tracking 1us to
+# 60s at 3 significant digits
+LATENCY_MIN_US = 1
+LATENCY_MAX_US = 60_000_000
+LATENCY_DIGITS = 3
+REPORT_INTERVAL = 5  # seconds
+
+# Workers sleep until deadlines rounded up to a shared TICK-second timer, so a
+# single timer wakes every worker due in the same tick
+TICK = 0.01
+
+# Random draws are generated with numpy in batches of RNG_BATCH
+RNG_BATCH = 65536
 
 # Track performance metrics
 metrics = {
-    "submit": {"count": 0, "total_time": 0, "errors": 0},
-    "top": {"count": 0, "total_time": 0, "errors": 0},
-    "rank": {"count": 0, "total_time": 0, "errors": 0},
+    endpoint: {
+        "count": 0,
+        "errors": 0,
+        "latency": HdrHistogram(LATENCY_MIN_US, LATENCY_MAX_US, LATENCY_DIGITS),
+    }
+    for endpoint in ("submit", "top", "rank")
 }
 
 
-def submit_score(user_id):
-    """Submit a random score for a user."""
-    score = random.randint(100, 10000)
-    try:
-        start = time.time()
-        response = requests.post(
-            f"{API_BASE_URL}/submit",
-            json={"user_id": user_id, "score": score},
-            timeout=10,
-        )
-        elapsed = (time.time() - start) * 1000  # ms
+def record(endpoint, elapsed_ns):
+    """Record one latency sample in the endpoint's histogram."""
+    m = metrics[endpoint]
+    m["latency"].record_value(max(elapsed_ns // 1000, LATENCY_MIN_US))
+    m["count"] += 1
+
+
+# Iterations started across all workers
+iterations_started = 0
 
-        metrics["submit"]["count"] += 1
-        metrics["submit"]["total_time"] += elapsed
+# Tick number -> Event for workers waking in that tick, and the last tick fired
+wake_events = {}
+last_tick = -1
 
-        if response.status_code == 201:
-            print(f"  [SUBMIT] user={user_id} score={score} -> {elapsed:.0f}ms")
-        else:
+
+async def submit_score(session, user_id, score):
+    """Submit a score for a user."""
+    try:
+        start = time.perf_counter_ns()
+        # user_id and score are plain ints, so the body can be formatted
+        # directly instead of building a dict for json.dumps
+        body = f'{{"user_id":{user_id},"score":{score}}}'.encode()
+        async with session.post(SUBMIT_URL, data=body, headers=JSON_HEADERS) as response:
+            await response.read()
+        record("submit", time.perf_counter_ns() - start)
+
+        if response.status != 201:
             metrics["submit"]["errors"] += 1
-            print(f"  [SUBMIT ERROR] {response.status_code}: {response.text[:100]}")
-    except requests.exceptions.RequestException as e:
+    except (aiohttp.ClientError, asyncio.TimeoutError):
         metrics["submit"]["errors"] += 1
-        print(f"  [SUBMIT FAILED] {str(e)[:80]}")
 
 
-def get_top_players():
+async def get_top_players(session):
     """Fetch the top 10 players."""
     try:
-        start = time.time()
-        response = requests.get(f"{API_BASE_URL}/top", timeout=10)
-        elapsed = (time.time() - start) * 1000
-
-        metrics["top"]["count"] += 1
-        metrics["top"]["total_time"] += elapsed
-
-        if response.status_code == 200:
-            data = response.json()
-            source = data.get("source", "unknown")
-            players = data.get("data", [])
-            if players:
-                top_player = players[0]
-                print(
-                    f"  [TOP]    #1: {top_player.get('username', 'N/A')} "
-                    f"(score: {top_player.get('total_score', 0)}) "
-                    f"[{source}] -> {elapsed:.0f}ms"
-                )
-            return data
-        else:
+        start = time.perf_counter_ns()
+        async with session.get(TOP_URL) as response:
+            await response.read()
+        record("top", time.perf_counter_ns() - start)
+
+        if response.status != 200:
             metrics["top"]["errors"] += 1
-            print(f"  [TOP ERROR] {response.status_code}")
-    except requests.exceptions.RequestException as e:
+    except (aiohttp.ClientError, asyncio.TimeoutError):
         metrics["top"]["errors"] += 1
-        print(f"  [TOP FAILED] {str(e)[:80]}")
-    return None
 
 
-def get_user_rank(user_id):
+async def get_user_rank(session, user_id):
     """Fetch a specific user's rank."""
     try:
-        start = time.time()
-        response = requests.get(f"{API_BASE_URL}/rank/{user_id}", timeout=10)
-        elapsed = (time.time() - start) * 1000
+        start = time.perf_counter_ns()
+        async with session.get(RANK_URL_PREFIX + str(user_id)) as response:
+            await response.read()
+        record("rank", time.perf_counter_ns() - start)
 
-        metrics["rank"]["count"] += 1
-        metrics["rank"]["total_time"] += elapsed
-
-        if response.status_code == 200:
-            data = response.json()
-            rank_data = data.get("data", {})
-            print(
-                f"  [RANK]   user={user_id} rank=#{rank_data.get('rank', '?')} "
-                f"score={rank_data.get('total_score', 0)} "
-                f"[{data.get('source', 'unknown')}] -> {elapsed:.0f}ms"
-            )
-            return data
-        elif response.status_code == 404:
-            print(f"  [RANK]   user={user_id} not found -> {elapsed:.0f}ms")
-        else:
+        # 404 just means the user has no leaderboard entry yet
+        if response.status not in (200, 404):
             metrics["rank"]["errors"] += 1
-    except requests.exceptions.RequestException as e:
+    except (aiohttp.ClientError, asyncio.TimeoutError):
         metrics["rank"]["errors"] += 1
-        print(f"  [RANK FAILED] {str(e)[:80]}")
-    return None
 
 
 def print_metrics():
-    """Print aggregated performance metrics."""
-    print("\n" + "=" * 60)
+    """Print aggregated performance metrics since the start of the run."""
+    print("\n" + "=" * 78)
     print("  PERFORMANCE METRICS")
-    print("=" * 60)
+    print("=" * 78)
     for endpoint, data in metrics.items():
         count = data["count"]
         if count > 0:
-            avg_time = data["total_time"] / count
+            latency = data["latency"]
+            p50, p95, p99, p999 = (
+                latency.get_value_at_percentile(p) / 1000 for p in (50, 95, 99, 99.9)
+            )
+            avg = latency.get_mean_value() / 1000
             print(
                 f"  {endpoint.upper():8s} | "
-                f"Requests: {count:5d} | "
-                f"Avg: {avg_time:7.1f}ms | "
+                f"Requests: {count:6d} | "
+                f"Avg: {avg:7.1f}ms | "
+                f"p50: {p50:7.1f}ms | "
+                f"p95: {p95:7.1f}ms | "
+                f"p99: {p99:7.1f}ms | "
+                f"p99.9: {p999:7.1f}ms | "
                 f"Errors: {data['errors']}"
             )
-    print("=" * 60 + "\n")
+    print("=" * 78 + "\n")
+
+
+async def reporter():
+    """Print metrics every REPORT_INTERVAL seconds."""
+    while True:
+        await asyncio.sleep(REPORT_INTERVAL)
+        print_metrics()
+
+
+async def ticker():
+    """Every TICK seconds, wake all workers whose deadline has passed."""
+    global last_tick
+    loop = asyncio.get_running_loop()
+    last_tick = math.floor(loop.time() / TICK)
+    while True:
+        await asyncio.sleep(max(0, (last_tick + 1) * TICK - loop.time()))
+        now_tick = math.floor(loop.time() / TICK)
+        while last_tick < now_tick:
+            last_tick += 1
+            event = wake_events.pop(last_tick, None)
+            if event is not None:
+                event.set()
+
+
+async def sleep_until(deadline):
+    """Sleep until the first shared tick at or after deadline (event loop time)."""
+    tick = math.ceil(deadline / TICK)
+    if tick <= last_tick:
+        return
+    event = wake_events.get(tick)
+    if event is None:
+        event = wake_events[tick] = asyncio.Event()
+    await event.wait()
+
+
+def random_draws(args):
+    """
+    Yield (user_id, score, sleep_time) tuples, refilled RNG_BATCH at a time.
+
+    Values are converted to Python lists so they are plain ints/floats
+    (JSON serializable) and cheap to index.
+    """
+    rng = np.random.default_rng()
+    while True:
+        yield from zip(
+            rng.integers(1, args.users + 1, RNG_BATCH).tolist(),
+            rng.integers(100, 10001, RNG_BATCH).tolist(),
+            rng.uniform(args.interval * 0.5, args.interval * 2, RNG_BATCH).tolist(),
+        )
+
+
+async def worker(session, worker_id, args, draws, in_flight):
+    """Simulate one user: submit, read the leaderboard, check own rank, repeat."""
+    global iterations_started
+
+    loop = asyncio.get_running_loop()
+    next_at = loop.time()
+    while args.iterations == 0 or iterations_started < args.iterations:
+        iterations_started += 1
+        user_id, score, sleep_time = next(draws)
+
+        # Submit a score, get top players and get this user's rank. The three
+        # requests are independent, so they are issued together; in_flight
+        # bounds how many iterations run concurrently across all workers
+        async with in_flight:
+            await asyncio.gather(
+                submit_score(session, user_id, score),
+                get_top_players(session),
+                get_user_rank(session, user_id),
+            )
+
+        # Simulate real user interaction delay. The next iteration is due
+        # sleep_time after the previous deadline, not after this one finished;
+        # after a stall it restarts from now instead of bursting to catch up
+        next_at = max(next_at, loop.time()) + sleep_time
+        await sleep_until(next_at)
+
+
+async def run(args):
+    """Run all workers over one keep-alive HTTP session."""
+    # The server speaks HTTP/1.1 only, so requests share a bounded pool of
+    # keep-alive connections; extra requests wait for a free connection
+    connector = aiohttp.TCPConnector(
+        limit=args.connections,
+        limit_per_host=args.connections,
+        family=socket.AF_INET,
+        use_dns_cache=True,
+        ttl_dns_cache=3600,
+        keepalive_timeout=max(KEEPALIVE_TIMEOUT, args.interval * 2),
+    )
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    # Responses are small; asking for identity saves gzip work on both ends
+    headers = {"Connection": "keep-alive", "Accept-Encoding": "identity"}
+    async with (
+        aiohttp.ClientSession(connector=connector, timeout=timeout, headers=headers) as session,
+        asyncio.TaskGroup() as tg,
+    ):
+        background = [
+            tg.create_task(reporter()),
+            tg.create_task(ticker()),
+        ]
+        # One draw stream shared by all workers; they run on one event loop thread
+        draws = random_draws(args)
+        in_flight = asyncio.Semaphore(args.concurrency)
+        async with asyncio.TaskGroup() as workers:
+            for i in range(args.workers):
+                workers.create_task(worker(session, i, args, draws, in_flight))
+        for task in background:
+            task.cancel()
 
 
 def main():
@@ -142,6 +281,15 @@ def main():
     parser.add_argument(
         "--iterations", type=int, default=0, help="Number of iterations (0 = infinite)"
     )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Number of concurrent simulated users"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=100, help="Max iterations in flight at once"
+    )
+    parser.add_argument(
+        "--connections", type=int, default=100, help="Max open HTTP connections to the server"
+    )
     args = parser.parse_args()
 
     print("═══════════════════════════════════════════════")
@@ -149,39 +297,14 @@ def main():
     print(f"  Target: {API_BASE_URL}")
     print(f"  User range: 1 - {args.users}")
     print(f"  Interval: {args.interval}s")
+    print(f"  Workers: {args.workers} (concurrency {args.concurrency})")
     print("  Press Ctrl+C to stop")
     print("═══════════════════════════════════════════════\n")
 
-    iteration = 0
     try:
-        while True:
-            iteration += 1
-            user_id = random.randint(1, args.users)
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            print(f"\n[{timestamp}] Iteration #{iteration} (user_id={user_id})")
-
-            # 1. Submit a score
-            submit_score(user_id)
-
-            # 2. Get top players
-            get_top_players()
-
-            # 3. Get this user's rank
-            get_user_rank(user_id)
-
-            # Print metrics every 10 iterations
-            if iteration % 10 == 0:
-                print_metrics()
-
-            # Check iteration limit
-            if args.iterations > 0 and iteration >= args.iterations:
-                print(f"\nCompleted {args.iterations} iterations.")
-                break
-
-            # Simulate real user interaction delay
-            sleep_time = random.uniform(args.interval * 0.5, args.interval * 2)
-            time.sleep(sleep_time)
-
+        run_loop(run(args))
+        print(f"\nCompleted {args.iterations} iterations.")
+        print_metrics()
     except KeyboardInterrupt:
         print("\n\nStopping simulation...")
         print_metrics()